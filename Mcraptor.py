@@ -2,18 +2,19 @@
 Module contains McRAPTOR implementation.
 '''
 
-import copy
+import time
 
 from collections import deque as deque
 from Mcraptor_functions import initialize_Mcraptor
-from Mcraptor_functions import merge
-from Mcraptor_functions import check_non_dominance
-from Mcraptor_functions import give_non_dominating_labels
 from Mcraptor_functions import get_latest_trip_new
-from Mcraptor_functions import IVTT
+from Mcraptor_functions import get_latest_departure_trip
+from Mcraptor_criteria import DEFAULT_CRITERIA
+from Mcraptor_criteria import REVERSE_DEFAULT_CRITERIA
+from Mcraptor_criteria import DEPARTURE_TIME
+from Mcraptor_criteria import build_criteria
 
 
-def McRAPTOR(SOURCE: int, DESTINATION: int, DEPARTURE_TIME_IN_SEC: int, trips_in_route_dict: dict, stops_in_trip_dict: dict, routes_by_stop_dict: dict, stops_dict: dict, stops_file, footpath_dict: dict, NUMBER_OF_CRITERIA: int,idx_by_route_stop_dict: dict ,MAX_TRANSFER: int) -> tuple:
+def McRAPTOR(SOURCE: int, DESTINATION: int, DEPARTURE_TIME_IN_SEC: int, trips_in_route_dict: dict, stops_in_trip_dict: dict, routes_by_stop_dict: dict, stops_dict: dict, stops_file, footpath_dict: dict, NUMBER_OF_CRITERIA: int,idx_by_route_stop_dict: dict ,MAX_TRANSFER: int, criteria: tuple = None) -> tuple:
     '''
 
     McRAPTOR implementation.
@@ -28,31 +29,155 @@ def McRAPTOR(SOURCE: int, DESTINATION: int, DEPARTURE_TIME_IN_SEC: int, trips_in
         stops_dict (dict): preprocessed dict. Format {route_id: [ids of stops in the route]}.
         stops_file (pandas.dataframe): having columns = ['stop_lat', 'stop_lon', 'stop_id'].
         footpath_dict (dict): preprocessed dict. Format {from_stop_id: [(to_stop_id, footpath_time)]}.
-        NUMBER_OF_CRITERIA (int): number of criteria taken other than rounds.
+        NUMBER_OF_CRITERIA (int): number of criteria taken other than rounds. Used only when criteria is None, to pick the leading criteria of DEFAULT_CRITERIA.
         idx_by_route_stop_dict (dict): preprocessed dict. Format {(route id, stop id): stop index in route}.
         MAX_TRANSFER (int): maximum transfer limit.
+        criteria (tuple): Criterion tuple from Mcraptor_criteria, e.g. (ARRIVAL_TIME, NUMBER_OF_STOPS, IVTT, WALKING_TIME). Default: DEFAULT_CRITERIA.
 
     Returns:
-            label_dict (dict): Nested dictionary that stores labels in the form of nested list for each stop at each round. Format-> {round: {stop_id: [[arrival_time, number_of_stops, IVTT, trip_id]] }}.
+            label_dict (dict): Nested dictionary that stores labels in the form of nested list for each stop at each round. Format-> {round: {stop_id: [[arrival_time, number_of_stops, IVTT, trip_id]] }}. With custom criteria the label is [criterion values in order of criteria, trip_id].
             inf_time (int): infinite time (datetime.datetime).
     '''
 
+    for _, label_dict, inf_time in _mcraptor_rounds(SOURCE, DESTINATION, DEPARTURE_TIME_IN_SEC, trips_in_route_dict, stops_in_trip_dict, routes_by_stop_dict, stops_dict, stops_file, footpath_dict, NUMBER_OF_CRITERIA, idx_by_route_stop_dict, MAX_TRANSFER, criteria, keep_all_rounds=True, verbose=True):
+        pass
+
+    return label_dict, inf_time
+
+
+def McRAPTOR_stream(SOURCE: int, DESTINATION: int, DEPARTURE_TIME_IN_SEC: int, trips_in_route_dict: dict, stops_in_trip_dict: dict, routes_by_stop_dict: dict, stops_dict: dict, stops_file, footpath_dict: dict, NUMBER_OF_CRITERIA: int, idx_by_route_stop_dict: dict, MAX_TRANSFER: int, criteria: tuple = None, deadline: float = None, cancel_event=None, keep_all_rounds: bool = False):
+    '''
+    Streaming McRAPTOR. Yields the new Pareto-optimal journeys to DESTINATION as soon as each round finishes, so the
+    fastest/direct journeys are available before the later rounds are computed.
+
+    Stop iterating (or call close() on the generator) to cancel the query. The search also stops silently once the
+    deadline passes or cancel_event is set; the journeys yielded until then stay valid.
+
+    Args:
+        SOURCE (int): stop id of source stop.
+        DESTINATION (int): stop id of destination stop.
+        DEPARTURE_TIME_IN_SEC (int): departure time in seconds.
+        trips_in_route_dict (dict): preprocessed dict. Format {route_id: [trip_id]}.
+        stops_in_trip_dict (dict): preprocessed dict. Format {trip_id: {stop_id: arrival_time at that stop}}.
+        routes_by_stop_dict (dict): preprocessed dict. Format {stop_id: [id of routes passing through stop]}.
+        stops_dict (dict): preprocessed dict. Format {route_id: [ids of stops in the route]}.
+        stops_file (pandas.dataframe): having columns = ['stop_lat', 'stop_lon', 'stop_id'].
+        footpath_dict (dict): preprocessed dict. Format {from_stop_id: [(to_stop_id, footpath_time)]}.
+        NUMBER_OF_CRITERIA (int): number of leading criteria of DEFAULT_CRITERIA used when criteria is None.
+        idx_by_route_stop_dict (dict): preprocessed dict. Format {(route id, stop id): stop index in route}.
+        MAX_TRANSFER (int): maximum transfer limit.
+        criteria (tuple): Criterion tuple from Mcraptor_criteria. Default: DEFAULT_CRITERIA.
+        deadline (float): time.time() value after which the search stops. None: no deadline.
+        cancel_event (threading.Event): search stops once cancel_event.is_set() is True. None: not cancellable.
+        keep_all_rounds (bool): if False, bags of round i-1 are dropped once round i finishes, so memory does not grow with rounds.
+
+    Yields:
+        round (int): round (number of trips) in which the journeys were found.
+        journeys (nested list): labels at DESTINATION which are not dominated by any journey yielded before. Format-> [[arrival_time, number_of_stops, IVTT, trip_id]].
+    '''
+    config = build_criteria(DEFAULT_CRITERIA[:NUMBER_OF_CRITERIA] if criteria is None else criteria)
+    found_journeys = []
+    for i, label_dict, inf_time in _mcraptor_rounds(SOURCE, DESTINATION, DEPARTURE_TIME_IN_SEC, trips_in_route_dict, stops_in_trip_dict, routes_by_stop_dict, stops_dict, stops_file, footpath_dict, NUMBER_OF_CRITERIA, idx_by_route_stop_dict, MAX_TRANSFER, criteria, keep_all_rounds=keep_all_rounds, verbose=False, deadline=deadline, cancel_event=cancel_event):
+        if i == 0:
+            continue
+        new_journeys = [label for label in label_dict[i][DESTINATION] if label[0] != inf_time and not config.dominated(label, found_journeys)]
+        if new_journeys:
+            found_journeys.extend(new_journeys)
+            yield i, new_journeys
+
+
+def McRAPTOR_reverse(DESTINATION: int, ARRIVAL_DEADLINE_IN_SEC: int, trips_in_route_dict: dict, stops_in_trip_dict: dict, routes_by_stop_dict: dict, stops_dict: dict, stops_file, reverse_footpath_dict: dict, NUMBER_OF_CRITERIA: int, idx_by_route_stop_dict: dict, MAX_TRANSFER: int, SOURCE: int = None, criteria: tuple = None) -> tuple:
+    '''
+    Arrive-by (reverse) McRAPTOR. Computes in a single run the Pareto-optimal latest departures from the stops that
+    reach DESTINATION by ARRIVAL_DEADLINE_IN_SEC. Routes are scanned backwards and trips are chosen by
+    get_latest_departure_trip.
+
+    Args:
+        DESTINATION (int): stop id of destination stop.
+        ARRIVAL_DEADLINE_IN_SEC (int): latest arrival time at DESTINATION in seconds.
+        trips_in_route_dict (dict): preprocessed dict. Format {route_id: [trip_id]}.
+        stops_in_trip_dict (dict): preprocessed dict. Format {trip_id: {stop_id: arrival_time at that stop}}.
+        routes_by_stop_dict (dict): preprocessed dict. Format {stop_id: [id of routes passing through stop]}.
+        stops_dict (dict): preprocessed dict. Format {route_id: [ids of stops in the route]}.
+        stops_file (pandas.dataframe): having columns = ['stop_lat', 'stop_lon', 'stop_id'].
+        reverse_footpath_dict (dict): footpaths by arrival stop, built by get_reverse_footpath_dict. Format {to_stop_id: [(from_stop_id, footpath_time)]}.
+        NUMBER_OF_CRITERIA (int): number of leading criteria of REVERSE_DEFAULT_CRITERIA used when criteria is None.
+        idx_by_route_stop_dict (dict): preprocessed dict. Format {(route id, stop id): stop index in route}.
+        MAX_TRANSFER (int): maximum transfer limit.
+        SOURCE (int): stop id of source stop. If given, labels which cannot improve the journeys from SOURCE are pruned. Default: journeys from all stops.
+        criteria (tuple): Criterion tuple from Mcraptor_criteria starting with DEPARTURE_TIME. Default: REVERSE_DEFAULT_CRITERIA.
+
+    Returns:
+            label_dict (dict): Nested dictionary that stores labels in the form of nested list for each stop at each round. Format-> {round: {stop_id: [[departure_time, number_of_stops, IVTT, trip_id]] }}.
+            neg_inf_time (int): departure time of the labels of unreached stops.
+    '''
+
+    for _, label_dict, inf_time in _mcraptor_rounds(DESTINATION, SOURCE, -ARRIVAL_DEADLINE_IN_SEC, trips_in_route_dict, stops_in_trip_dict, routes_by_stop_dict, stops_dict, stops_file, reverse_footpath_dict, NUMBER_OF_CRITERIA, idx_by_route_stop_dict, MAX_TRANSFER, criteria, keep_all_rounds=True, verbose=True, reverse=True):
+        pass
+
+    # departure times are negated during the search, see Mcraptor_criteria.DEPARTURE_TIME
+    for round_labels in label_dict.values():
+        for bag in round_labels.values():
+            for label in bag:
+                label[0] = -label[0]
+
+    return label_dict, -inf_time
+
+
+def _is_cancelled(deadline, cancel_event) -> bool:
+    return (deadline is not None and time.time() > deadline) or (cancel_event is not None and cancel_event.is_set())
+
+
+def _mcraptor_rounds(SOURCE, DESTINATION, DEPARTURE_TIME_IN_SEC, trips_in_route_dict, stops_in_trip_dict, routes_by_stop_dict, stops_dict, stops_file, footpath_dict, NUMBER_OF_CRITERIA, idx_by_route_stop_dict, MAX_TRANSFER, criteria, keep_all_rounds, verbose, deadline=None, cancel_event=None, reverse=False):
+    '''
+    McRAPTOR rounds shared by McRAPTOR, McRAPTOR_stream and McRAPTOR_reverse. Yields (round, label_dict, inf_time)
+    after the initialization (round 0) and after each finished round. If keep_all_rounds is False, label_dict only
+    holds the bags of the last finished round.
+
+    With reverse=True the search starts at SOURCE (the arrival stop of the query) with DEPARTURE_TIME_IN_SEC set to
+    the negated arrival deadline, routes are scanned backwards and DESTINATION (if not None) is used for pruning only.
+    Journeys may end with one walk into SOURCE (as the walks of main code part 3): the stops one footpath away from
+    SOURCE are marked for round 1 and can be boarded from there, but are not journeys on their own.
+    '''
+
     # Initialization
-    label_dict, star_label, marked_stop_dict, inf_time, marked_stop = initialize_Mcraptor(stops_file, SOURCE, MAX_TRANSFER)
+    if criteria is None:
+        criteria = (REVERSE_DEFAULT_CRITERIA if reverse else DEFAULT_CRITERIA)[:NUMBER_OF_CRITERIA]
+    config = build_criteria(criteria)
+    if (config.criteria[0].name == DEPARTURE_TIME.name) != reverse:
+        raise ValueError("McRAPTOR_reverse needs DEPARTURE_TIME as first criterion, McRAPTOR needs ARRIVAL_TIME")
+    dominated, pareto, merge = config.dominated, config.pareto, config.merge
+    label_dict, star_label, marked_stop_dict, inf_time, marked_stop = initialize_Mcraptor(stops_file, SOURCE, MAX_TRANSFER if keep_all_rounds else 0, config)
 
-    label_dict[0][SOURCE][0][0], label_dict[0][SOURCE][0][1], label_dict[0][SOURCE][0][2] = DEPARTURE_TIME_IN_SEC, 1, 0
-    star_label[SOURCE][0][0], star_label[SOURCE][0][1], star_label[SOURCE][0][2] = DEPARTURE_TIME_IN_SEC, 1, 0
+    label_dict[0][SOURCE] = [config.source_label(DEPARTURE_TIME_IN_SEC) + [-1]]
+    star_label[SOURCE] = [config.source_label(DEPARTURE_TIME_IN_SEC) + [-1]]
+    walk_in_label = {}
+    if reverse:
+        # arrive-by journeys may end with one walk into the arrival stop, only used for boarding in round 1
+        for tup in footpath_dict.get(SOURCE, []):
+            if tup[0] != SOURCE:
+                temp_bag = [config.footpath(li, SOURCE, tup[0], tup[1]) for li in label_dict[0][SOURCE]]
+                walk_in_label[tup[0]], _ = merge(walk_in_label.get(tup[0], []), temp_bag)
+                marked_stop.append(tup[0])
+                marked_stop_dict[tup[0]] = 1
+    yield 0, label_dict, inf_time
 
     # Main Code
     # Main code part 1
     for i in range(1, MAX_TRANSFER+1):
-        print("Round", i)
+        if verbose:
+            print("Round", i)
+        if _is_cancelled(deadline, cancel_event):
+            return
+        if i not in label_dict:
+            infinite_label = config.infinite_label(inf_time)
+            label_dict[i] = {stop: [infinite_label + [-1]] for stop in label_dict[i-1]}
         Q = {}
         while marked_stop:
             mark_stop = marked_stop.pop()
             for route in routes_by_stop_dict[mark_stop]:
                 if route in Q.keys():
-                    if stops_dict[route].index(mark_stop) < stops_dict[route].index(Q[route]):
+                    if (stops_dict[route].index(mark_stop) < stops_dict[route].index(Q[route])) != reverse:
                         Q[route] = mark_stop
                 else:
                     Q[route] = mark_stop
@@ -60,25 +185,27 @@ def McRAPTOR(SOURCE: int, DESTINATION: int, DEPARTURE_TIME_IN_SEC: int, trips_in
 
         # Main code part 2
         for route in Q.keys():
+            if _is_cancelled(deadline, cancel_event):
+                return
             Br = []
-            current_route_stops = stops_dict[route][idx_by_route_stop_dict[(route, Q[route])]:]
+            if reverse:
+                current_route_stops = stops_dict[route][idx_by_route_stop_dict[(route, Q[route])]::-1]
+            else:
+                current_route_stops = stops_dict[route][idx_by_route_stop_dict[(route, Q[route])]:]
             for id,stop_in_route in enumerate(current_route_stops):
                 ''' First step '''
                 for label in Br:
-                    t = label[-1]
-                    label[0] = stops_in_trip_dict[t][stop_in_route]
-                    label[1] = label[1] + 1
-                    label[2] = IVTT(current_route_stops[id-1], stop_in_route, stops_in_trip_dict, label)
+                    config.ride(label, current_route_stops[id-1], stop_in_route, stops_in_trip_dict)
 
                 ''' Second step '''
                 Bkp = label_dict[i][stop_in_route]
                 Br_new = []
                 for Li in Br:
-                    if check_non_dominance(Li, star_label[stop_in_route], NUMBER_OF_CRITERIA) and check_non_dominance(Li, star_label[DESTINATION], NUMBER_OF_CRITERIA):
+                    if not dominated(Li, star_label[stop_in_route]) and not dominated(Li, star_label.get(DESTINATION, ())):
                         Br_new.append(Li)
-                        star_label[stop_in_route] = give_non_dominating_labels([Li] + star_label[stop_in_route], NUMBER_OF_CRITERIA)
+                        star_label[stop_in_route] = pareto([Li] + star_label[stop_in_route])
 
-                Bkp_new, newly_added_labels = merge(Bkp, Br_new, NUMBER_OF_CRITERIA)
+                Bkp_new, newly_added_labels = merge(Bkp, Br_new)
 
                 label_dict[i][stop_in_route] = Bkp_new
                 if len(newly_added_labels) > 0:
@@ -87,12 +214,19 @@ def McRAPTOR(SOURCE: int, DESTINATION: int, DEPARTURE_TIME_IN_SEC: int, trips_in
 
                 ''' Third step '''
                 Bk_1p = label_dict[i-1][stop_in_route]
-                temp_br, new_labels = merge(Br, Bk_1p, NUMBER_OF_CRITERIA)
+                if i == 1 and stop_in_route in walk_in_label:
+                    Bk_1p = walk_in_label[stop_in_route]
+                if config.transfer is not None:
+                    Bk_1p = [config.transfer(lab, stop_in_route) for lab in Bk_1p]
+                temp_br, new_labels = merge(Br, Bk_1p)
                 Br_updated = []
                 for lab in temp_br:
                     if lab in new_labels:
                         Time = lab[0]
-                        t = get_latest_trip_new(route, stop_in_route, Time, trips_in_route_dict, stops_in_trip_dict)
+                        if reverse:
+                            t = get_latest_departure_trip(route, stop_in_route, -Time, trips_in_route_dict, stops_in_trip_dict)
+                        else:
+                            t = get_latest_trip_new(route, stop_in_route, Time, trips_in_route_dict, stops_in_trip_dict)
                         lab[-1] = t
                         if t != -1:
                             Br_updated.append(lab)
@@ -101,24 +235,26 @@ def McRAPTOR(SOURCE: int, DESTINATION: int, DEPARTURE_TIME_IN_SEC: int, trips_in
                 Br = [x for x in Br_updated]
 
         # Main code part 3
+        # one walk after the trips of this round: labels walked in this loop are not walked again, and they only prune
+        # through star_label at DESTINATION since a walked label cannot be walked further in a later round
         marked_stop_copy = [*marked_stop]
+        bag_copy = {mark_stop: label_dict[i][mark_stop] for mark_stop in marked_stop_copy}
         for mark_stop in marked_stop_copy:
             if mark_stop in footpath_dict.keys():
                 for tup in footpath_dict[mark_stop]:
-                    temp_bag = copy.deepcopy(label_dict[i][mark_stop])
-                    for li in temp_bag:
-                        li[0] = li[0] + tup[1]
-                        li[1] += 1
+                    temp_bag = [config.footpath(li, mark_stop, tup[0], tup[1]) for li in bag_copy[mark_stop]]
                     Bkpj = label_dict[i][tup[0]]
-                    Bkpj_new, new_lab = merge(Bkpj, temp_bag, NUMBER_OF_CRITERIA)
+                    Bkpj_new, new_lab = merge(Bkpj, temp_bag)
                     label_dict[i][tup[0]] = Bkpj_new
-                    star_label[tup[0]] = give_non_dominating_labels(temp_bag + star_label[tup[0]], NUMBER_OF_CRITERIA)
+                    if tup[0] == DESTINATION:
+                        star_label[tup[0]] = pareto(temp_bag + star_label[tup[0]])
                     if len(new_lab) > 0:
                         marked_stop.append(tup[0])
                         marked_stop_dict[tup[0]] = 1
 
         # Main code End
+        if not keep_all_rounds:
+            del label_dict[i-1]
+        yield i, label_dict, inf_time
         if marked_stop == deque([]):
             break
-
-    return label_dict, inf_time
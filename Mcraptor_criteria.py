@@ -0,0 +1,232 @@
+"""
+Module contains the criteria spec API for McRAPTOR.
+
+Each criterion is declared once, together with its update rule on ride, transfer and footpath. build_criteria
+compiles a tuple of criteria into a CriteriaConfig holding specialised kernels (dominance check, pareto filter, merge
+and label updates) for exactly that label layout, so McRAPTOR does not pay the generic slicing overhead.
+
+Label layout for a configuration with n criteria: [criterion_0, ..., criterion_n-1, trip_id]. Criterion 0 is
+always the arrival time (McRAPTOR) or the negated departure time (McRAPTOR_reverse), so every criterion is minimised.
+"""
+
+import functools
+
+from collections import namedtuple
+
+
+Criterion = namedtuple("Criterion", ["name", "initial", "infinity", "ride", "transfer", "footpath"], defaults=(None, None, None))
+Criterion.__doc__ = """
+Declaration of a single (minimised, non-decreasing) criterion.
+
+Args:
+    name (str): name of the criterion. Must be unique within a configuration.
+    initial: value at the SOURCE stop. None means the departure time (only used by the arrival/departure time).
+    infinity: value of an unreached label. None means inf_time of initialize_Mcraptor (only used by the arrival/departure time).
+    ride (function or None): update when the label rides its trip to the next stop.
+        Format-> ride(value, trip_id, previous_stop, current_stop, stops_in_trip_dict) -> value. None keeps the value.
+    transfer (function or None): update when the label boards a trip at a stop.
+        Format-> transfer(value, stop_id) -> value. None keeps the value.
+    footpath (function or None): update when the label walks a footpath.
+        Format-> footpath(value, from_stop_id, to_stop_id, footpath_time) -> value. None keeps the value.
+"""
+
+CriteriaConfig = namedtuple("CriteriaConfig", ["criteria", "index", "size", "infinite_label", "source_label", "dominated", "pareto", "merge", "ride", "transfer", "footpath"])
+CriteriaConfig.__doc__ = """
+Specialised label layout and kernels for one tuple of criteria. Built by build_criteria.
+
+Args:
+    criteria (tuple): the Criterion tuple the config was built from.
+    index (dict): position of each criterion in the label. Format-> {name: index}. The trip id is at index size.
+    size (int): number of criteria.
+    infinite_label (function): infinite_label(inf_time) -> list of criteria values of an unreached label.
+    source_label (function): source_label(departure_time) -> list of criteria values at the SOURCE stop.
+    dominated (function): dominated(label, bag) -> True if any label in bag is at least as good in every criterion.
+    pareto (function): pareto(labels) -> pairwise non-dominating labels without trip.
+    merge (function): merge(existing_bag, new_bag) -> (merged_bag, newly_added_labels), newly added labels get trip_id -1.
+    ride (function): ride(label, previous_stop, current_stop, stops_in_trip_dict) updates label in place.
+    transfer (function or None): transfer(label, stop_id) -> new label. None if no criterion changes on boarding.
+    footpath (function): footpath(label, from_stop_id, to_stop_id, footpath_time) -> new label.
+"""
+
+
+def _ride_arrival_time(value, trip_id, previous_stop, current_stop, stops_in_trip_dict):
+    return stops_in_trip_dict[trip_id][current_stop]
+
+
+def _ride_ivtt(value, trip_id, previous_stop, current_stop, stops_in_trip_dict):
+    return value + stops_in_trip_dict[trip_id][current_stop] - stops_in_trip_dict[trip_id][previous_stop]
+
+
+def _ride_departure_time(value, trip_id, previous_stop, current_stop, stops_in_trip_dict):
+    return -stops_in_trip_dict[trip_id][current_stop]
+
+
+def _ride_reverse_ivtt(value, trip_id, previous_stop, current_stop, stops_in_trip_dict):
+    return value + stops_in_trip_dict[trip_id][previous_stop] - stops_in_trip_dict[trip_id][current_stop]
+
+
+def _increment(value, *args):
+    return value + 1
+
+
+def _add_footpath_time(value, from_stop_id, to_stop_id, footpath_time):
+    return value + footpath_time
+
+
+ARRIVAL_TIME = Criterion("arrival_time", None, None, ride=_ride_arrival_time, footpath=_add_footpath_time)
+NUMBER_OF_STOPS = Criterion("number_of_stops", 1, 100000, ride=_increment, footpath=_increment)
+IVTT = Criterion("IVTT", 0, 10000000000, ride=_ride_ivtt)
+WALKING_TIME = Criterion("walking_time", 0, 10000000000, footpath=_add_footpath_time)
+
+DEFAULT_CRITERIA = (ARRIVAL_TIME, NUMBER_OF_STOPS, IVTT)
+
+# Criteria for McRAPTOR_reverse: routes are scanned backwards, so previous_stop is the later stop of the trip and the
+# departure time is stored negated (a later departure is a smaller value).
+DEPARTURE_TIME = Criterion("departure_time", None, None, ride=_ride_departure_time, footpath=_add_footpath_time)
+REVERSE_IVTT = Criterion("IVTT", 0, 10000000000, ride=_ride_reverse_ivtt)
+
+REVERSE_DEFAULT_CRITERIA = (DEPARTURE_TIME, NUMBER_OF_STOPS, REVERSE_IVTT)
+
+
+def zone_fare(zone_by_stop_dict: dict, base_fare: float, zone_crossing_fare: float, name: str = "fare") -> Criterion:
+    """
+    Builds a zone-based fare criterion: base_fare is paid at every boarding and zone_crossing_fare each time the trip
+    moves into a different zone. Each call returns a new criterion and so a new kernel set in build_criteria; build it
+    once per zone table and reuse it across queries.
+
+    Args:
+        zone_by_stop_dict (dict): zone of each stop. Format-> {stop_id: zone_id}. Stops without a zone never cross.
+        base_fare (float): fare paid when boarding a trip.
+        zone_crossing_fare (float): fare paid per zone crossed on a trip.
+        name (str): name of the criterion.
+
+    Returns:
+        criterion (Criterion): fare criterion.
+    """
+
+    def ride(value, trip_id, previous_stop, current_stop, stops_in_trip_dict):
+        previous_zone = zone_by_stop_dict.get(previous_stop)
+        current_zone = zone_by_stop_dict.get(current_stop)
+        if previous_zone is not None and current_zone is not None and previous_zone != current_zone:
+            return value + zone_crossing_fare
+        return value
+
+    def transfer(value, stop_id):
+        return value + base_fare
+
+    return Criterion(name, 0, 10000000000, ride=ride, transfer=transfer)
+
+
+def _compile(function_name: str, source: str, namespace: dict):
+    exec(compile(source, f"<criteria kernel {function_name}>", "exec"), namespace)
+    return namespace[function_name]
+
+
+@functools.lru_cache(maxsize=64)
+def _build_config(criteria: tuple) -> CriteriaConfig:
+    n = len(criteria)
+    slots = range(n)
+    namespace = {}
+    for i, criterion in enumerate(criteria):
+        namespace[f"ride_{i}"] = criterion.ride
+        namespace[f"transfer_{i}"] = criterion.transfer
+        namespace[f"footpath_{i}"] = criterion.footpath
+
+    key = "(" + "".join(f"lab[{i}], " for i in slots) + ")"
+    o_dominates_k = " and ".join(f"o[{i}] <= k[{i}]" for i in slots)
+
+    dominated_source = (
+        "def dominated(label, bag):\n"
+        + "".join(f"    l{i} = label[{i}]\n" for i in slots)
+        + "    for b in bag:\n"
+        + "        if " + " and ".join(f"b[{i}] <= l{i}" for i in slots) + ":\n"
+        + "            return True\n"
+        + "    return False\n"
+    )
+
+    pareto_source = (
+        "def pareto(labels):\n"
+        "    keys = {}\n"
+        "    for lab in labels:\n"
+        f"        keys[{key}] = None\n"
+        "    return [list(k) for k in keys if not any(" + o_dominates_k + " and o != k for o in keys)]\n"
+    )
+
+    merge_source = (
+        "def merge(existing_bag, new_bag):\n"
+        "    existing = {}\n"
+        "    for lab in existing_bag:\n"
+        f"        group = existing.setdefault({key}, [])\n"
+        "        if lab not in group:\n"
+        "            group.append(lab)\n"
+        "    keys = dict.fromkeys(existing)\n"
+        "    for lab in new_bag:\n"
+        f"        keys[{key}] = None\n"
+        "    merged_bag = []\n"
+        "    newly_added_labels = []\n"
+        "    for k in keys:\n"
+        "        if any(" + o_dominates_k + " and o != k for o in keys):\n"
+        "            continue\n"
+        "        if k in existing:\n"
+        "            merged_bag.extend([list(lab) for lab in existing[k]])\n"
+        "        else:\n"
+        "            lab = [*k, -1]\n"
+        "            merged_bag.append(lab)\n"
+        "            newly_added_labels.append(lab)\n"
+        "    return merged_bag, newly_added_labels\n"
+    )
+
+    ride_source = (
+        "def ride(label, previous_stop, current_stop, stops_in_trip_dict):\n"
+        f"    trip_id = label[{n}]\n"
+        + "".join(f"    label[{i}] = ride_{i}(label[{i}], trip_id, previous_stop, current_stop, stops_in_trip_dict)\n" for i in slots if criteria[i].ride is not None)
+    )
+
+    transfer_source = (
+        "def transfer(label, stop_id):\n"
+        "    return [" + "".join(f"transfer_{i}(label[{i}], stop_id), " if criteria[i].transfer is not None else f"label[{i}], " for i in slots) + f"label[{n}]]\n"
+    )
+
+    footpath_source = (
+        "def footpath(label, from_stop_id, to_stop_id, footpath_time):\n"
+        "    return [" + "".join(f"footpath_{i}(label[{i}], from_stop_id, to_stop_id, footpath_time), " if criteria[i].footpath is not None else f"label[{i}], " for i in slots) + f"label[{n}]]\n"
+    )
+
+    def infinite_label(inf_time):
+        return [inf_time if criterion.infinity is None else criterion.infinity for criterion in criteria]
+
+    def source_label(departure_time):
+        return [departure_time if criterion.initial is None else criterion.initial for criterion in criteria]
+
+    return CriteriaConfig(
+        criteria=criteria,
+        index={criterion.name: i for i, criterion in enumerate(criteria)},
+        size=n,
+        infinite_label=infinite_label,
+        source_label=source_label,
+        dominated=_compile("dominated", dominated_source, namespace),
+        pareto=_compile("pareto", pareto_source, namespace),
+        merge=_compile("merge", merge_source, namespace),
+        ride=_compile("ride", ride_source, namespace),
+        transfer=_compile("transfer", transfer_source, namespace) if any(c.transfer is not None for c in criteria) else None,
+        footpath=_compile("footpath", footpath_source, namespace),
+    )
+
+
+def build_criteria(criteria: tuple = DEFAULT_CRITERIA) -> CriteriaConfig:
+    """
+    Compiles the specialised label layout and kernels for the given criteria. The most recently used configurations
+    are cached, so calling this once per query is cheap.
+
+    Args:
+        criteria (tuple): Criterion tuple. The first criterion must be ARRIVAL_TIME (or DEPARTURE_TIME for McRAPTOR_reverse).
+
+    Returns:
+        criteria_config (CriteriaConfig): label layout and kernels for the criteria.
+    """
+    criteria = tuple(criteria)
+    if not criteria or criteria[0].name not in (ARRIVAL_TIME.name, DEPARTURE_TIME.name):
+        raise ValueError("first criterion must be the arrival time or the departure time")
+    if len({criterion.name for criterion in criteria}) != len(criteria):
+        raise ValueError("criterion names must be unique")
+    return _build_config(criteria)
@@ -5,12 +5,17 @@ to print the pareto optimal set of journeys, convert timestamp to total seconds
 
 import datetime as dt
 
-def read_testcase(FOLDER: str) -> tuple:
+# GTFS times of day may exceed 24:00:00 but never by days, seconds since 1970 of any real service day are far larger
+MAX_TIME_OF_DAY_IN_SEC = 7 * 86400
+
+def read_testcase(FOLDER: str, START_DATE: str = None, NUMBER_OF_DAYS: int = 1) -> tuple:
     """
     Reads the GTFS network and preprocessed dict. If the dicts are not present, dict_builder_functions are called to construct them.
 
     Args:
         FOLDER (str): GTFS path
+        START_DATE (str): first service day of the horizon. Format-> '%Y-%m-%d'. Required if stop times are GTFS times of day ('HH:MM:SS'), the service calendar (calendar.txt/calendar_dates.txt) is then used. Must be None if stop times are timestamps ('%Y-%m-%d %H:%M:%S').
+        NUMBER_OF_DAYS (int): number of service days in the horizon. Used only with START_DATE.
 
     Returns:
         stops_file (pandas.dataframe):  stops.txt file in GTFS.
@@ -19,11 +24,14 @@ def read_testcase(FOLDER: str) -> tuple:
         transfers_file (pandas.dataframe): dataframe with transfers (footpath) details.
         stops_dict (dict): keys: route_id, values: list of stop id in the route_id. Format-> dict[route_id] = [stop_id]
         trips_in_route_dict (dict): keys: route ID, values: list of trips in the increasing order of start time. Format-> dict[route_ID] = [trip_1, trip_2].
-        stops_in_trip_dict (dict): nested dictionary with primary key: trip_id and secondary key: stop_id with value: arrival time of that trip on that stop. Format-> {trip_id: {stop_id: arrival_time}}
+        stops_in_trip_dict (dict): nested dictionary with primary key: trip_id and secondary key: stop_id with value: arrival time of that trip on that stop. Format-> {trip_id: {stop_id: arrival_time}}. A ServiceCalendarTimetable if START_DATE is given.
         footpath_dict (dict): keys: from stop_id, values: list of tuples of form (to stop id, footpath duration). Format-> dict[stop_id]=[(stop_id, footpath_duration)]
         route_by_stop_dict_new (dict): keys: stop_id, values: list of routes passing through the stop_id. Format-> dict[stop_id] = [route_id]
         idx_by_route_stop_dict (dict): preprocessed dict. Format {(route id, stop id): stop index in route}.
 
+    Raises:
+        ValueError: if START_DATE does not match the time format of the stop times.
+
     """
     import gtfs_loader
     from dict_builder import dict_builder_functions
@@ -37,9 +45,29 @@ def read_testcase(FOLDER: str) -> tuple:
         routes_by_stop_dict = dict_builder_functions.build_save_route_by_stop(stop_times_file, FOLDER)
         footpath_dict = dict_builder_functions.build_save_footpath_dict(transfers_file, FOLDER)
         idx_by_route_stop_dict = dict_builder_functions.stop_idx_in_route(stop_times_file, FOLDER)
+    times_of_day = _has_times_of_day(stops_in_trip_dict)
+    if times_of_day and START_DATE is None:
+        raise ValueError(f"stop times of {FOLDER} are GTFS times of day ('HH:MM:SS'), pass START_DATE (and NUMBER_OF_DAYS) to read_testcase")
+    if not times_of_day and START_DATE is not None:
+        raise ValueError(f"stop times of {FOLDER} are timestamps ('%Y-%m-%d %H:%M:%S'), START_DATE is only supported for GTFS times of day ('HH:MM:SS')")
+    if START_DATE is not None:
+        from service_calendar import ServiceCalendarTimetable
+        try:
+            service_days_dict = gtfs_loader.load_service_days_dict(FOLDER, START_DATE, NUMBER_OF_DAYS)
+        except FileNotFoundError:
+            calendar_file, calendar_dates_file = gtfs_loader.load_calendar_db(FOLDER)
+            if calendar_file is None and calendar_dates_file is None:
+                raise FileNotFoundError(f"calendar.txt or calendar_dates.txt is needed in ./GTFS/{FOLDER} to use START_DATE")
+            service_days_dict = dict_builder_functions.build_save_service_days_dict(trips_file, calendar_file, calendar_dates_file, START_DATE, NUMBER_OF_DAYS, FOLDER)
+        stops_in_trip_dict = ServiceCalendarTimetable(stops_in_trip_dict, service_days_dict, START_DATE, NUMBER_OF_DAYS)
 
     return stops_file, trips_file, stop_times_file, transfers_file, stops_dict, trips_in_route_dict, stops_in_trip_dict, footpath_dict, routes_by_stop_dict, idx_by_route_stop_dict
 
+def _has_times_of_day(stops_in_trip_dict) -> bool:
+    for stop_times in stops_in_trip_dict.values():
+        return max(stop_times.values()) < MAX_TIME_OF_DAY_IN_SEC
+    return False
+
 def print_network_details(transfers_file, trips_file, stops_file) -> None:
     """
     Prints the network details like number of routes, trips, stops, footpath
@@ -146,4 +174,21 @@ def convert_to_sec(string):
     timedelta = dt.datetime.strptime(string, '%Y-%m-%d %H:%M:%S') - dt.datetime.strptime("1970-01-01 00:00:00", '%Y-%m-%d %H:%M:%S')
     sec = timedelta.total_seconds()
 
-    return sec
\ No newline at end of file
+    return sec
+
+
+def convert_time_of_day_to_sec(string):
+    """
+    convert the given GTFS time of day into seconds lapsed from midnight of the service day. GTFS times can exceed 24:00:00 for trips running past midnight.
+
+    Args:
+        string (str): denotes the time of day in the form of 'HH:MM:SS'.
+
+    Returns:
+        sec (int): seconds lapsed from midnight of the service day.
+
+    """
+    hours, minutes, seconds = string.strip().split(":")
+    sec = int(hours) * 3600 + int(minutes) * 60 + int(seconds)
+
+    return sec
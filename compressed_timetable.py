@@ -0,0 +1,122 @@
+'''
+Module contains the compressed representation of stops_in_trip_dict.
+
+Trips of a route usually share the same inter-stop travel times and only differ by their start time. The compressed
+timetable keeps one travel-time pattern {stop_id: offset from trip start} per distinct trip shape and one start time
+per trip. When pickled, trips of a pattern running at a constant headway are collapsed further into a single
+frequency run (pattern, first start, headway, trip ids).
+
+CompressedTimetable is a drop-in replacement for stops_in_trip_dict: stops_in_trip_dict[trip_id][stop_id] still
+returns the arrival time in O(1), so McRAPTOR, the criteria kernels and get_latest_trip_new work unchanged.
+'''
+
+from collections.abc import Mapping
+
+
+class TripTimes(Mapping):
+    '''
+    Arrival times of one trip. Format-> {stop_id: arrival_time}, computed as start + pattern[stop_id].
+
+    Args:
+        pattern (dict): travel-time pattern shared by all trips of the same shape. Format-> {stop_id: offset in seconds}.
+        start (float): arrival time of the trip at its first stop in seconds.
+    '''
+
+    __slots__ = ("pattern", "start")
+
+    def __init__(self, pattern: dict, start: float):
+        self.pattern = pattern
+        self.start = start
+
+    def __getitem__(self, stop_id):
+        return self.start + self.pattern[stop_id]
+
+    def __contains__(self, stop_id):
+        return stop_id in self.pattern
+
+    def __iter__(self):
+        return iter(self.pattern)
+
+    def __len__(self):
+        return len(self.pattern)
+
+    def __repr__(self):
+        return f"TripTimes({dict(self.items())})"
+
+
+class CompressedTimetable(dict):
+    '''
+    Compressed stops_in_trip_dict. Format-> {trip_id: TripTimes}. Built by compress_stops_in_trip_dict.
+    '''
+
+    def __reduce__(self):
+        return _rebuild_timetable, _collapse_runs(self)
+
+
+def compress_stops_in_trip_dict(stops_in_trip_dict) -> CompressedTimetable:
+    """
+    This function compress stops_in_trip_dict by sharing one travel-time pattern between all trips of the same shape.
+
+    Args:
+        stops_in_trip_dict (dict): nested dictionary with primary key: trip_id and secondary key: stop_id with value: arrival time of that trip on that stop. Format-> {trip_id: {stop_id: arrival_time}}.
+
+    Returns:
+        compressed_stops_in_trip_dict (CompressedTimetable): same content as stops_in_trip_dict. Format-> {trip_id: TripTimes}.
+    """
+    patterns = {}
+    compressed_stops_in_trip_dict = CompressedTimetable()
+    for trip_id, stop_times in stops_in_trip_dict.items():
+        start = min(stop_times.values())
+        shape = tuple((stop_id, arrival_time - start) for stop_id, arrival_time in stop_times.items())
+        pattern = patterns.get(shape)
+        if pattern is None:
+            pattern = patterns[shape] = dict(shape)
+        compressed_stops_in_trip_dict[trip_id] = TripTimes(pattern, start)
+
+    return compressed_stops_in_trip_dict
+
+
+def _collapse_runs(timetable: CompressedTimetable) -> tuple:
+    """
+    Collapses the trips of each pattern into frequency runs of constant headway.
+
+    Returns:
+        patterns (list): distinct travel-time patterns.
+        runs (list): frequency runs. Format-> [(pattern index, first start, headway, (trip_id_1, trip_id_2, ..))].
+    """
+    pattern_idx = {}
+    patterns = []
+    trips_by_pattern = {}
+    for trip_id, trip_times in timetable.items():
+        key = id(trip_times.pattern)
+        if key not in pattern_idx:
+            pattern_idx[key] = len(patterns)
+            patterns.append(trip_times.pattern)
+        trips_by_pattern.setdefault(pattern_idx[key], []).append((trip_times.start, trip_id))
+
+    runs = []
+    for idx, trips in trips_by_pattern.items():
+        trips.sort(key=lambda trip: trip[0])
+        run_start = 0
+        while run_start < len(trips):
+            run_end = run_start + 1
+            if run_end < len(trips):
+                headway = trips[run_end][0] - trips[run_start][0]
+                while run_end < len(trips) and trips[run_end][0] - trips[run_end - 1][0] == headway:
+                    run_end += 1
+            else:
+                headway = 0
+            runs.append((idx, trips[run_start][0], headway, tuple(trip_id for _, trip_id in trips[run_start:run_end])))
+            run_start = run_end
+
+    return patterns, runs
+
+
+def _rebuild_timetable(patterns: list, runs: list) -> CompressedTimetable:
+    timetable = CompressedTimetable()
+    for idx, first_start, headway, trip_ids in runs:
+        pattern = patterns[idx]
+        for k, trip_id in enumerate(trip_ids):
+            timetable[trip_id] = TripTimes(pattern, first_start + k * headway)
+
+    return timetable
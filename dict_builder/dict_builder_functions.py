@@ -6,6 +6,7 @@ This is done for easy/faster data lookup.
 import pickle
 from tqdm import tqdm
 import numpy as np
+from compressed_timetable import compress_stops_in_trip_dict
 
 def build_save_route_by_stop(stop_times_file, FOLDER: str) -> dict:
     """
@@ -72,13 +73,14 @@ def build_save_trips_in_route_dict(stop_times_file, FOLDER: str) -> dict:
 
     return trips_in_route_dict
 
-def build_save_stops_in_trip_dict(stop_times_file, FOLDER: str) -> dict:
+def build_save_stops_in_trip_dict(stop_times_file, FOLDER: str, compress: bool = True) -> dict:
     """
         This function saves a dictionary to provide easy access to all the stop arrival time, stored in increasing order of arrival time.
 
         Args:
             stop_times_file (pandas.dataframe): stop_times.txt file in GTFS.
             FOLDER (str): path to network folder.
+            compress (bool): if True, trips with the same travel-time pattern share it (see compressed_timetable).
 
         Returns:
             stops_in_trip_dict (dict): nested dictionary with primary key: trip_id and secondary key: stop_id with value: arrival time of that trip on that stop. Format-> {trip_id: {stop_id: arrival_time}}
@@ -93,6 +95,8 @@ def build_save_stops_in_trip_dict(stop_times_file, FOLDER: str) -> dict:
         for i in range(content.shape[0]):
             temp[content.stop_id.iloc[i]] = float(content.arrival_time_in_sec.iloc[i])
         stops_in_trip_dict[trip_id] = temp
+    if compress:
+        stops_in_trip_dict = compress_stops_in_trip_dict(stops_in_trip_dict)
 
     with open(f'./dict_builder/{FOLDER}/stops_in_trip_dict_pkl.pkl', 'wb') as pickle_file:
         pickle.dump(stops_in_trip_dict, pickle_file)
@@ -149,3 +153,54 @@ def stop_idx_in_route(stop_times_file, FOLDER: str)-> dict:
     print("idx_by_route_stop done")
 
     return idx_by_route_stop
+
+def build_save_service_days_dict(trips_file, calendar_file, calendar_dates_file, START_DATE: str, NUMBER_OF_DAYS: int, FOLDER: str) -> dict:
+    """
+    This function saves a dictionary with the service days of each trip within the horizon as a bitmask, so that the timetable is stored once and not per date.
+
+    Args:
+        trips_file (pandas.dataframe): trips.txt file in GTFS (with service_id column).
+        calendar_file (pandas.dataframe): calendar.txt file in GTFS, or None.
+        calendar_dates_file (pandas.dataframe): calendar_dates.txt file in GTFS, or None.
+        START_DATE (str): first service day of the horizon. Format-> '%Y-%m-%d'.
+        NUMBER_OF_DAYS (int): number of service days in the horizon.
+        FOLDER (str): path to network folder.
+
+    Returns:
+        service_days_dict (dict): keys: trip_id, values: bitmask with bit d set if the trip runs on day d of the horizon. Format-> dict[trip_id] = bitmask
+    """
+    import datetime as dt
+
+    print("building service_days dict..")
+    start_date = dt.datetime.strptime(START_DATE, '%Y-%m-%d').date()
+    dates = [start_date + dt.timedelta(days=day) for day in range(NUMBER_OF_DAYS)]
+    weekdays = ["monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday"]
+
+    service_bitmask = {}
+    if calendar_file is not None:
+        for _, service in calendar_file.iterrows():
+            first_date = dt.datetime.strptime(str(service.start_date), '%Y%m%d').date()
+            last_date = dt.datetime.strptime(str(service.end_date), '%Y%m%d').date()
+            bitmask = 0
+            for day, date in enumerate(dates):
+                if first_date <= date <= last_date and int(service[weekdays[date.weekday()]]) == 1:
+                    bitmask |= 1 << day
+            service_bitmask[str(service.service_id)] = bitmask
+    if calendar_dates_file is not None:
+        day_by_date = {date.strftime('%Y%m%d'): day for day, date in enumerate(dates)}
+        for service_id, date, exception_type in zip(calendar_dates_file.service_id, calendar_dates_file.date, calendar_dates_file.exception_type):
+            day = day_by_date.get(str(date))
+            if day is None:
+                continue
+            if int(exception_type) == 1:
+                service_bitmask[str(service_id)] = service_bitmask.get(str(service_id), 0) | (1 << day)
+            else:
+                service_bitmask[str(service_id)] = service_bitmask.get(str(service_id), 0) & ~(1 << day)
+
+    service_days_dict = {trip_id: service_bitmask.get(str(service_id), 0) for trip_id, service_id in tqdm(zip(trips_file.trip_id, trips_file.service_id))}
+
+    with open(f'./dict_builder/{FOLDER}/service_days_dict_{START_DATE}_{NUMBER_OF_DAYS}_pkl.pkl', 'wb') as pickle_file:
+        pickle.dump(service_days_dict, pickle_file)
+    print("service_days_dict done")
+
+    return service_days_dict
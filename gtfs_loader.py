@@ -16,7 +16,7 @@ def load_all_dict(FOLDER: str):
     Returns:
         stops_dict (dict): preprocessed dict. Format {route_id: [ids of stops in the route]}.
         trips_in_route_dict (dict): preprocessed dict. Format keys: trip ID, values: list of trips in the increasing order of start time. Format-> dict[route_ID] = [trip_1, trip_2].
-        stops_in_trip_dict (dict): preprocessed nested dictionary with primary key: trip_id and secondary key: stop_id with value: arrival time of that trip on that stop. Format-> {trip_id: {stop_id: arrival_time}}
+        stops_in_trip_dict (dict): preprocessed nested dictionary with primary key: trip_id and secondary key: stop_id with value: arrival time of that trip on that stop. Format-> {trip_id: {stop_id: arrival_time}} (a CompressedTimetable if built with compression).
         footpath_dict (dict): preprocessed dict. Format {from_stop_id: [(to_stop_id, footpath_time)]}.
         routes_by_stop_dict (dict): preprocessed dict. Format {stop_id: [id of routes passing through stop]}.
         idx_by_route_stop_dict (dict): preprocessed dict. Format {(route id, stop id): stop index in route}.
@@ -38,6 +38,23 @@ def load_all_dict(FOLDER: str):
 
 
 
+def load_service_days_dict(FOLDER: str, START_DATE: str, NUMBER_OF_DAYS: int):
+    """
+    Args:
+        FOLDER (str): network folder.
+        START_DATE (str): first service day of the horizon. Format-> '%Y-%m-%d'.
+        NUMBER_OF_DAYS (int): number of service days in the horizon.
+
+    Returns:
+        service_days_dict (dict): preprocessed dict for this horizon. Format {trip_id: bitmask of service days}.
+    """
+    with open(f'./dict_builder/{FOLDER}/service_days_dict_{START_DATE}_{NUMBER_OF_DAYS}_pkl.pkl', 'rb') as file:
+        service_days_dict = pickle.load(file)
+
+    return service_days_dict
+
+
+
 def load_all_db(FOLDER: str):
     """
     Args:
@@ -51,15 +68,43 @@ def load_all_db(FOLDER: str):
     """
     import pandas as pd
     from Miscellenous_functions import convert_to_sec
+    from Miscellenous_functions import convert_time_of_day_to_sec
 
     path = f"./GTFS/{FOLDER}"
     stops_file = pd.read_csv(f'{path}/stops.txt', sep=',')
     trips_file = pd.read_csv(f'{path}/trips.txt', sep=',')
     stop_times_file = pd.read_csv(f'{path}/stop_times.txt', sep=',')
     if type(stop_times_file.arrival_time.iloc[0]) == str:
-        stop_times_file["arrival_time_in_sec"] = stop_times_file["arrival_time"].apply(convert_to_sec)
+        # GTFS times of day ('HH:MM:SS') are kept relative to the service day, see service_calendar.
+        if "-" in stop_times_file.arrival_time.iloc[0]:
+            stop_times_file["arrival_time_in_sec"] = stop_times_file["arrival_time"].apply(convert_to_sec)
+        else:
+            stop_times_file["arrival_time_in_sec"] = stop_times_file["arrival_time"].apply(convert_time_of_day_to_sec)
     if "route_id" not in stop_times_file.columns:
         stop_times_file = pd.merge(stop_times_file, trips_file, on='trip_id')
     transfers_file = pd.read_csv(f'{path}/transfers.txt', sep=',')
 
-    return stops_file, trips_file, stop_times_file, transfers_file
\ No newline at end of file
+    return stops_file, trips_file, stop_times_file, transfers_file
+
+
+
+def load_calendar_db(FOLDER: str):
+    """
+    Args:
+        FOLDER (str): path to network folder.
+
+    Returns:
+        calendar_file (pandas.dataframe): dataframe with calendar.txt details, None if the file is not present.
+        calendar_dates_file (pandas.dataframe): dataframe with calendar_dates.txt details, None if the file is not present.
+    """
+    import os
+    import pandas as pd
+
+    path = f"./GTFS/{FOLDER}"
+    calendar_file, calendar_dates_file = None, None
+    if os.path.exists(f'{path}/calendar.txt'):
+        calendar_file = pd.read_csv(f'{path}/calendar.txt', sep=',', dtype={"service_id": str, "start_date": str, "end_date": str})
+    if os.path.exists(f'{path}/calendar_dates.txt'):
+        calendar_dates_file = pd.read_csv(f'{path}/calendar_dates.txt', sep=',', dtype={"service_id": str, "date": str})
+
+    return calendar_file, calendar_dates_file
\ No newline at end of file
@@ -0,0 +1,193 @@
+"""
+This module runs the scaling benchmark on synthetic GTFS networks of increasing size.
+
+For each size it reports preprocessing time (dict_builder), load time of the preprocessed dicts, per-query latency
+of McRAPTOR and peak memory of loading and of a query. Every query is also checked against McRAPTOR_reverse in both
+directions. The networks have GTFS times of day and a calendar.txt, so queries run over the service calendar.
+"""
+
+import contextlib
+import io
+import os
+import random
+import statistics
+import time
+import tracemalloc
+
+import gtfs_loader
+from Mcraptor import McRAPTOR
+from Mcraptor import McRAPTOR_reverse
+from Mcraptor_functions import get_reverse_footpath_dict
+from service_calendar import ServiceCalendarTimetable
+from synthetic_gtfs import generate_synthetic_gtfs
+
+
+def run_scaling_benchmark(SIZES: list, TOPOLOGY: str, ROUTES_PER_STOP: float, TRIPS_PER_ROUTE: int, FOOTPATH_DENSITY: float, NUMBER_OF_QUERIES: int, MAX_TRANSFER: int, SEED: int, SERVICE_DATE: str = "2019-06-10") -> list:
+    """
+    Generates a synthetic network per size, preprocesses it, loads it and runs random queries.
+
+    Args:
+        SIZES (list): number of stops of each network.
+        TOPOLOGY (str): 'grid' or 'radial'.
+        ROUTES_PER_STOP (float): number of routes per stop, so the route count grows with the network.
+        TRIPS_PER_ROUTE (int): number of trips per route.
+        FOOTPATH_DENSITY (float): average number of footpaths per served stop.
+        NUMBER_OF_QUERIES (int): number of random queries per network.
+        MAX_TRANSFER (int): maximum transfer limit.
+        SEED (int): random seed of the networks and queries.
+        SERVICE_DATE (str): service day of the networks and queries. Format-> '%Y-%m-%d'.
+
+    Returns:
+        results (list): one dict per size with keys stops, routes, trips, preprocessing_s, load_s, load_mb, query_ms, query_mb, reverse_mismatches.
+    """
+    from dict_builder import dict_builder_functions
+
+    results = []
+    for NUMBER_OF_STOPS in SIZES:
+        FOLDER = f"synthetic_{TOPOLOGY}_{NUMBER_OF_STOPS}"
+        NUMBER_OF_ROUTES = max(1, int(NUMBER_OF_STOPS * ROUTES_PER_STOP))
+        generate_synthetic_gtfs(FOLDER, NUMBER_OF_STOPS, NUMBER_OF_ROUTES, TRIPS_PER_ROUTE, FOOTPATH_DENSITY, TOPOLOGY, SEED, SERVICE_DATE)
+        os.makedirs(f"./dict_builder/{FOLDER}", exist_ok=True)
+
+        # builders print their progress, keep the report readable
+        with contextlib.redirect_stdout(io.StringIO()), contextlib.redirect_stderr(io.StringIO()):
+            start = time.time()
+            stops_file, trips_file, stop_times_file, transfers_file = gtfs_loader.load_all_db(FOLDER)
+            calendar_file, calendar_dates_file = gtfs_loader.load_calendar_db(FOLDER)
+            dict_builder_functions.build_save_stops_dict(stop_times_file, FOLDER)
+            dict_builder_functions.build_save_trips_in_route_dict(stop_times_file, FOLDER)
+            dict_builder_functions.build_save_stops_in_trip_dict(stop_times_file, FOLDER)
+            dict_builder_functions.build_save_route_by_stop(stop_times_file, FOLDER)
+            dict_builder_functions.build_save_footpath_dict(transfers_file, FOLDER)
+            dict_builder_functions.stop_idx_in_route(stop_times_file, FOLDER)
+            dict_builder_functions.build_save_service_days_dict(trips_file, calendar_file, calendar_dates_file, SERVICE_DATE, 1, FOLDER)
+            preprocessing_s = time.time() - start
+
+        tracemalloc.start()
+        start = time.time()
+        routes_by_stop_dict, stops_dict, trips_in_route_dict, stops_in_trip_dict, footpath_dict, idx_by_route_stop_dict = gtfs_loader.load_all_dict(FOLDER)
+        service_days_dict = gtfs_loader.load_service_days_dict(FOLDER, SERVICE_DATE, 1)
+        stops_in_trip_dict = ServiceCalendarTimetable(stops_in_trip_dict, service_days_dict, SERVICE_DATE, 1)
+        load_s = time.time() - start
+        load_mb = tracemalloc.get_traced_memory()[0] / 1e6
+        tracemalloc.stop()
+
+        rnd = random.Random(SEED)
+        served_stops = sorted(routes_by_stop_dict)
+        first_departure = stops_in_trip_dict.horizon_start + min(stop_times_file.arrival_time_in_sec)
+        queries = [tuple(rnd.sample(served_stops, 2)) + (first_departure + rnd.randrange(3 * 3600),) for _ in range(NUMBER_OF_QUERIES)]
+
+        def run_query(SOURCE, DESTINATION, DEPARTURE_TIME_IN_SEC):
+            with contextlib.redirect_stdout(io.StringIO()):
+                return McRAPTOR(SOURCE, DESTINATION, DEPARTURE_TIME_IN_SEC, trips_in_route_dict, stops_in_trip_dict, routes_by_stop_dict, stops_dict, stops_file, footpath_dict, 3, idx_by_route_stop_dict, MAX_TRANSFER)
+
+        latencies = []
+        reverse_mismatches = 0
+        reverse_footpath_dict = get_reverse_footpath_dict(footpath_dict)
+        for query in queries:
+            start = time.time()
+            label_dict, inf_time = run_query(*query)
+            latencies.append(time.time() - start)
+            if not check_reverse_against_forward(*query, label_dict, inf_time, trips_in_route_dict, stops_in_trip_dict, routes_by_stop_dict, stops_dict, stops_file, footpath_dict, reverse_footpath_dict, idx_by_route_stop_dict, MAX_TRANSFER):
+                reverse_mismatches += 1
+
+        # memory is measured separately, tracemalloc slows the query down
+        tracemalloc.start()
+        run_query(*queries[0])
+        query_mb = tracemalloc.get_traced_memory()[1] / 1e6
+        tracemalloc.stop()
+
+        results.append({
+            "stops": NUMBER_OF_STOPS,
+            "routes": NUMBER_OF_ROUTES,
+            "trips": len(trips_file),
+            "preprocessing_s": preprocessing_s,
+            "load_s": load_s,
+            "load_mb": load_mb,
+            "query_ms": 1000 * statistics.median(latencies),
+            "query_mb": query_mb,
+            "reverse_mismatches": reverse_mismatches,
+        })
+        print_scaling_row(results[-1])
+
+    return results
+
+
+def check_reverse_against_forward(SOURCE, DESTINATION, DEPARTURE_TIME_IN_SEC, label_dict, inf_time, trips_in_route_dict, stops_in_trip_dict, routes_by_stop_dict, stops_dict, stops_file, footpath_dict, reverse_footpath_dict, idx_by_route_stop_dict, MAX_TRANSFER) -> bool:
+    """
+    Checks McRAPTOR_reverse, run with the earliest arrival of a forward query as deadline, in both directions: its
+    latest departure from SOURCE must not be earlier than the forward departure (reverse is not too pessimistic), and
+    McRAPTOR from SOURCE at that latest departure must reach DESTINATION by the deadline (reverse is not too
+    optimistic). Reverse journeys may start with a walk from SOURCE, so the replay also departs from the footpath
+    neighbours of SOURCE.
+
+    Args:
+        SOURCE (int): stop id of source stop.
+        DESTINATION (int): stop id of destination stop.
+        DEPARTURE_TIME_IN_SEC (int): departure time of the forward query in seconds.
+        label_dict (dict): labels returned by McRAPTOR for the forward query.
+        inf_time (float): infinite time returned by McRAPTOR.
+        trips_in_route_dict, stops_in_trip_dict, routes_by_stop_dict, stops_dict, stops_file, footpath_dict, idx_by_route_stop_dict (dict): preprocessed network, as for McRAPTOR.
+        reverse_footpath_dict (dict): footpaths by arrival stop, built by get_reverse_footpath_dict.
+        MAX_TRANSFER (int): maximum transfer limit.
+
+    Returns:
+        True if the reverse search is consistent with the forward one (or DESTINATION is unreachable), else False.
+    """
+    arrivals = [label[0] for i in range(1, MAX_TRANSFER + 1) for label in label_dict[i][DESTINATION] if label[0] != inf_time]
+    if not arrivals:
+        return True
+    deadline = min(arrivals)
+    with contextlib.redirect_stdout(io.StringIO()):
+        reverse_label_dict, neg_inf_time = McRAPTOR_reverse(DESTINATION, deadline, trips_in_route_dict, stops_in_trip_dict, routes_by_stop_dict, stops_dict, stops_file, reverse_footpath_dict, 3, idx_by_route_stop_dict, MAX_TRANSFER, SOURCE=SOURCE)
+    departures = [label[0] for bag in reverse_label_dict.values() for label in bag[SOURCE] if label[0] != neg_inf_time]
+    if not departures or max(departures) < DEPARTURE_TIME_IN_SEC:
+        return False
+
+    latest_departure = max(departures)
+    replay_arrivals = []
+    for from_stop, walking_time in [(SOURCE, 0)] + footpath_dict.get(SOURCE, []):
+        with contextlib.redirect_stdout(io.StringIO()):
+            replay_label_dict, replay_inf_time = McRAPTOR(from_stop, DESTINATION, latest_departure + walking_time, trips_in_route_dict, stops_in_trip_dict, routes_by_stop_dict, stops_dict, stops_file, footpath_dict, 3, idx_by_route_stop_dict, MAX_TRANSFER)
+        replay_arrivals.extend(label[0] for i in range(1, MAX_TRANSFER + 1) for label in replay_label_dict[i][DESTINATION] if label[0] != replay_inf_time)
+
+    return bool(replay_arrivals) and min(replay_arrivals) <= deadline
+
+
+def print_scaling_row(result: dict) -> None:
+    """
+    Prints one row of the scaling report.
+
+    Args:
+        result (dict): result of one network size, see run_scaling_benchmark.
+
+    Returns:
+        None
+    """
+    print(f"| {result['stops']:>7} | {result['routes']:>6} | {result['trips']:>7} | {result['preprocessing_s']:>9.2f} | {result['load_s']:>7.3f} | {result['load_mb']:>7.1f} | {result['query_ms']:>12.1f} | {result['query_mb']:>8.1f} | {result['reverse_mismatches']:>10} |")
+
+    return None
+
+
+def main():
+    """
+    Runs the scaling benchmark for the given parameters.
+
+    """
+    SIZES = [100, 400, 1600]
+    TOPOLOGY = "grid"
+    ROUTES_PER_STOP = 0.1
+    TRIPS_PER_ROUTE = 50
+    FOOTPATH_DENSITY = 2
+    NUMBER_OF_QUERIES = 10
+    MAX_TRANSFER = 5
+    SEED = 0
+
+    print(f"___________________Scaling Benchmark ({TOPOLOGY})__________________")
+    print("|   Stops | Routes |   Trips | Prepro. s |  Load s | Load MB | Query ms p50 | Query MB | Reverse KO |")
+    run_scaling_benchmark(SIZES, TOPOLOGY, ROUTES_PER_STOP, TRIPS_PER_ROUTE, FOOTPATH_DENSITY, NUMBER_OF_QUERIES, MAX_TRANSFER, SEED)
+    print("___________________________________________________________________________________________________")
+
+
+if __name__ == "__main__":
+    main()
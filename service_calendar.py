@@ -0,0 +1,161 @@
+'''
+Module contains the multi-day service calendar support.
+
+The timetable stores the stop times of each trip once, as seconds after midnight of its service day (GTFS times, may
+exceed 24:00:00), together with a per-trip bitmask of the service days it runs on within the horizon. Dated trips
+(trip_id, day) are only built on demand when McRAPTOR rides them, and the trip lookup steps across midnight into the next
+service day on the fly, so a week-long horizon costs about the same memory as a single day.
+'''
+
+from collections.abc import Mapping
+
+from Miscellenous_functions import convert_to_sec
+
+SECONDS_PER_DAY = 86400
+
+
+class DatedTripTimes(Mapping):
+    '''
+    Arrival times of one trip on one service day. Format-> {stop_id: arrival_time}, computed as day_start + time of day.
+
+    Args:
+        times_of_day (dict): arrival times of the trip in seconds after midnight. Format-> {stop_id: time_of_day}.
+        day_start (float): midnight of the service day in seconds.
+    '''
+
+    __slots__ = ("times_of_day", "day_start")
+
+    def __init__(self, times_of_day, day_start: float):
+        self.times_of_day = times_of_day
+        self.day_start = day_start
+
+    def __getitem__(self, stop_id):
+        return self.day_start + self.times_of_day[stop_id]
+
+    def __contains__(self, stop_id):
+        return stop_id in self.times_of_day
+
+    def __iter__(self):
+        return iter(self.times_of_day)
+
+    def __len__(self):
+        return len(self.times_of_day)
+
+
+class ServiceCalendarTimetable(Mapping):
+    '''
+    stops_in_trip_dict over a multi-day horizon. Format-> {(trip_id, day): {stop_id: arrival_time}}, where day is the
+    index of the service day from START_DATE. Pass it to McRAPTOR (or McRAPTOR_reverse) in place of
+    stops_in_trip_dict; labels then carry dated trips (trip_id, day) as trip id.
+
+    Args:
+        stops_in_trip_dict (dict): arrival times in seconds after midnight of the service day (plain dict or CompressedTimetable). Format-> {trip_id: {stop_id: time_of_day}}.
+        service_days_dict (dict): bitmask of the service days of each trip, bit d set if the trip runs on day d. Format-> {trip_id: bitmask}.
+        START_DATE (str): first service day of the horizon. Format-> '%Y-%m-%d'.
+        NUMBER_OF_DAYS (int): number of service days in the horizon.
+    '''
+
+    def __init__(self, stops_in_trip_dict, service_days_dict: dict, START_DATE: str, NUMBER_OF_DAYS: int):
+        self.stops_in_trip_dict = stops_in_trip_dict
+        self.service_days_dict = service_days_dict
+        self.number_of_days = NUMBER_OF_DAYS
+        self.horizon_start = convert_to_sec(f"{START_DATE} 00:00:00")
+        self.max_time_of_day = max((max(times.values()) for times in stops_in_trip_dict.values()), default=0)
+        self.horizon_end = self.horizon_start + (NUMBER_OF_DAYS - 1) * SECONDS_PER_DAY + self.max_time_of_day
+        self._max_time_of_day_by_route = {}
+
+    def __getitem__(self, dated_trip):
+        trip_id, day = dated_trip
+        return DatedTripTimes(self.stops_in_trip_dict[trip_id], self.horizon_start + day * SECONDS_PER_DAY)
+
+    def __iter__(self):
+        for trip_id, service_days in self.service_days_dict.items():
+            for day in range(self.number_of_days):
+                if service_days >> day & 1:
+                    yield trip_id, day
+
+    def __len__(self):
+        return sum(bin(service_days & ((1 << self.number_of_days) - 1)).count("1") for service_days in self.service_days_dict.values())
+
+    def runs_on(self, trip_id, day: int) -> bool:
+        return self.service_days_dict.get(trip_id, 0) >> day & 1 == 1
+
+    def route_max_time_of_day(self, route_id, trips_in_route_dict) -> float:
+        '''
+        Latest time of day of any trip of the route, computed once per route. Only routes with trips past 24:00:00
+        make the dated trip lookups look into the previous service day.
+        '''
+        max_time_of_day = self._max_time_of_day_by_route.get(route_id)
+        if max_time_of_day is None:
+            max_time_of_day = max((max(self.stops_in_trip_dict[trip_id].values()) for trip_id in trips_in_route_dict[route_id]), default=0)
+            self._max_time_of_day_by_route[route_id] = max_time_of_day
+        return max_time_of_day
+
+    def get_earliest_dated_trip(self, route_id, stop_id, arrival_time, trips_in_route_dict):
+        """
+        This function return the earliest dated trip after a certain time from the given stop of a route, looking into the following service days if needed.
+
+        Args:
+            route_id (int): id of route
+            stop_id (int): id of stop
+            arrival_time (int): arrival time at stop in seconds.
+            trips_in_route_dict (dict): keys: route ID, values: list of trips in the increasing order of start time. Format-> dict[route_ID] = [trip_1, trip_2].
+
+        Returns:
+            if trip exists:
+                (trip ID, day)
+            else:
+                -1
+        """
+        if arrival_time > self.horizon_end:
+            return -1
+        # first service day whose trips can still reach the stop after arrival_time (the arrival's own day unless the route runs past 24:00:00)
+        route_max_time_of_day = self.route_max_time_of_day(route_id, trips_in_route_dict)
+        first_day = max(0, -int((self.horizon_start + route_max_time_of_day - arrival_time) // SECONDS_PER_DAY))
+        best_time, best_trip = float("inf"), -1
+        for day in range(first_day, self.number_of_days):
+            day_start = self.horizon_start + day * SECONDS_PER_DAY
+            if day_start > best_time:
+                break
+            for trip_id in trips_in_route_dict[route_id]:
+                if self.runs_on(trip_id, day):
+                    trip_time = day_start + self.stops_in_trip_dict[trip_id][stop_id]
+                    if trip_time >= arrival_time:
+                        if trip_time < best_time:
+                            best_time, best_trip = trip_time, (trip_id, day)
+                        break
+        return best_trip
+
+    def get_latest_dated_trip(self, route_id, stop_id, departure_time, trips_in_route_dict):
+        """
+        This function return the latest dated trip reaching the given stop of a route at or before a certain time, looking into the previous service days if needed.
+
+        Args:
+            route_id (int): id of route
+            stop_id (int): id of stop
+            departure_time (int): latest time at which the stop must be reached, in seconds.
+            trips_in_route_dict (dict): keys: route ID, values: list of trips in the increasing order of start time. Format-> dict[route_ID] = [trip_1, trip_2].
+
+        Returns:
+            if trip exists:
+                (trip ID, day)
+            else:
+                -1
+        """
+        if departure_time < self.horizon_start:
+            return -1
+        last_day = min(self.number_of_days - 1, int((departure_time - self.horizon_start) // SECONDS_PER_DAY))
+        route_max_time_of_day = self.route_max_time_of_day(route_id, trips_in_route_dict)
+        best_time, best_trip = -float("inf"), -1
+        for day in range(last_day, -1, -1):
+            day_start = self.horizon_start + day * SECONDS_PER_DAY
+            if day_start + route_max_time_of_day < best_time:
+                break
+            for trip_id in reversed(trips_in_route_dict[route_id]):
+                if self.runs_on(trip_id, day):
+                    trip_time = day_start + self.stops_in_trip_dict[trip_id][stop_id]
+                    if trip_time <= departure_time:
+                        if trip_time > best_time:
+                            best_time, best_trip = trip_time, (trip_id, day)
+                        break
+        return best_trip
@@ -0,0 +1,239 @@
+'''
+Module contains a seeded generator for synthetic GTFS networks, used for scaling and stress benchmarks.
+
+The generated folder is GTFS-shaped (stops.txt, trips.txt with service_id, stop_times.txt with 'HH:MM:SS' times of
+day, calendar.txt and transfers.txt), so it can be preprocessed with dict_builder_functions and queried with McRAPTOR
+over a service calendar like any other network. Late trips run past 24:00:00. TIME_FORMAT='absolute' writes
+'%Y-%m-%d %H:%M:%S' timestamps instead, for the single-day timetable without service calendar.
+'''
+
+import math
+import os
+import random
+import datetime as dt
+
+BUS_SPEED = 8.0                # m/s
+WALKING_SPEED = 1.3            # m/s
+DWELL_TIME = 30                # seconds per stop
+MAX_WALKING_DISTANCE = 800.0   # metres
+HEADWAYS = [300, 600, 900, 1200, 1800]
+CENTER_LAT, CENTER_LON = 46.9480, 7.4474
+
+
+def generate_synthetic_gtfs(FOLDER: str, NUMBER_OF_STOPS: int, NUMBER_OF_ROUTES: int, TRIPS_PER_ROUTE: int, FOOTPATH_DENSITY: float, TOPOLOGY: str = "grid", SEED: int = 0, SERVICE_DATE: str = "2019-06-10", NUMBER_OF_DAYS: int = 1, TIME_FORMAT: str = "time_of_day") -> tuple:
+    """
+    Generates a synthetic GTFS network and writes it to ./GTFS/FOLDER.
+
+    Args:
+        FOLDER (str): network folder name.
+        NUMBER_OF_STOPS (int): number of stops.
+        NUMBER_OF_ROUTES (int): number of routes. Every trip of a route has the same travel times and starts one headway after the previous one.
+        TRIPS_PER_ROUTE (int): number of trips per route.
+        FOOTPATH_DENSITY (float): average number of footpaths per served stop (to its nearest stops within walking distance).
+        TOPOLOGY (str): 'grid' (straight lines on a square grid) or 'radial' (lines through the center and ring lines).
+        SEED (int): random seed. The same arguments always give the same network.
+        SERVICE_DATE (str): first service date of the trips. Format-> '%Y-%m-%d'.
+        NUMBER_OF_DAYS (int): number of consecutive service days in calendar.txt, all trips run every day.
+        TIME_FORMAT (str): 'time_of_day' ('HH:MM:SS' after midnight of the service day) or 'absolute' ('%Y-%m-%d %H:%M:%S' on SERVICE_DATE).
+
+    Returns:
+        stops_file (pandas.dataframe): dataframe with stop details.
+        trips_file (pandas.dataframe): dataframe with trip details.
+        stop_times_file (pandas.dataframe): dataframe with stoptimes details.
+        transfers_file (pandas.dataframe): dataframe with transfers (footpath) details.
+        calendar_file (pandas.dataframe): dataframe with calendar.txt details.
+    """
+    import pandas as pd
+
+    if NUMBER_OF_STOPS < 2:
+        raise ValueError("a network needs at least 2 stops")
+    rnd = random.Random(SEED)
+    if TOPOLOGY == "grid":
+        position, routes = _grid_network(NUMBER_OF_STOPS, NUMBER_OF_ROUTES, rnd)
+    elif TOPOLOGY == "radial":
+        position, routes = _radial_network(NUMBER_OF_STOPS, NUMBER_OF_ROUTES, rnd)
+    else:
+        raise ValueError(f"unknown topology {TOPOLOGY}, expected 'grid' or 'radial'")
+    if TIME_FORMAT not in ("time_of_day", "absolute"):
+        raise ValueError(f"unknown time format {TIME_FORMAT}, expected 'time_of_day' or 'absolute'")
+
+    stops_file = pd.DataFrame({
+        "stop_lat": [CENTER_LAT + position[stop_id][1] / 111320 for stop_id in position],
+        "stop_lon": [CENTER_LON + position[stop_id][0] / (111320 * math.cos(math.radians(CENTER_LAT))) for stop_id in position],
+        "stop_id": list(position),
+    })
+
+    service_start = dt.datetime.strptime(SERVICE_DATE, '%Y-%m-%d')
+    service_id = "daily"
+    trip_rows, stop_time_rows = [], []
+    for route_id, route_stops in enumerate(routes):
+        travel_times = [0]
+        for previous_stop, stop in zip(route_stops, route_stops[1:]):
+            travel_times.append(travel_times[-1] + max(60, int(_distance(position[previous_stop], position[stop]) / BUS_SPEED) + DWELL_TIME))
+        headway = rnd.choice(HEADWAYS)
+        first_departure = 5 * 3600 + rnd.randrange(headway)
+        for k in range(TRIPS_PER_ROUTE):
+            trip_id = f"{route_id}_{k}"
+            trip_rows.append((route_id, service_id, trip_id))
+            start = first_departure + k * headway
+            for stop_sequence, (stop_id, travel_time) in enumerate(zip(route_stops, travel_times)):
+                if TIME_FORMAT == "absolute":
+                    arrival_time = (service_start + dt.timedelta(seconds=start + travel_time)).strftime('%Y-%m-%d %H:%M:%S')
+                else:
+                    arrival_time = _format_time_of_day(start + travel_time)
+                stop_time_rows.append((trip_id, arrival_time, stop_id, stop_sequence))
+    trips_file = pd.DataFrame(trip_rows, columns=["route_id", "service_id", "trip_id"])
+    stop_times_file = pd.DataFrame(stop_time_rows, columns=["trip_id", "arrival_time", "stop_id", "stop_sequence"])
+
+    served_stops = sorted({stop_id for route_stops in routes for stop_id in route_stops})
+    transfers_file = pd.DataFrame(_footpaths(position, served_stops, FOOTPATH_DENSITY, rnd), columns=["from_stop_id", "to_stop_id", "min_transfer_time"])
+
+    service_end = service_start + dt.timedelta(days=NUMBER_OF_DAYS - 1)
+    calendar_file = pd.DataFrame([{
+        "service_id": service_id,
+        **{weekday: 1 for weekday in ["monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday"]},
+        "start_date": service_start.strftime('%Y%m%d'),
+        "end_date": service_end.strftime('%Y%m%d'),
+    }])
+
+    path = f"./GTFS/{FOLDER}"
+    os.makedirs(path, exist_ok=True)
+    stops_file.to_csv(f'{path}/stops.txt', index=False)
+    trips_file.to_csv(f'{path}/trips.txt', index=False)
+    stop_times_file.to_csv(f'{path}/stop_times.txt', index=False)
+    transfers_file.to_csv(f'{path}/transfers.txt', index=False)
+    calendar_file.to_csv(f'{path}/calendar.txt', index=False)
+
+    return stops_file, trips_file, stop_times_file, transfers_file, calendar_file
+
+
+def _format_time_of_day(sec: int) -> str:
+    # GTFS times of day count from midnight of the service day and may exceed 24:00:00
+    return f"{sec // 3600:02d}:{sec % 3600 // 60:02d}:{sec % 60:02d}"
+
+
+def _distance(a: tuple, b: tuple) -> float:
+    return math.hypot(a[0] - b[0], a[1] - b[1])
+
+
+def _grid_network(NUMBER_OF_STOPS: int, NUMBER_OF_ROUTES: int, rnd) -> tuple:
+    """
+    Stops on a square grid with 400 m spacing, routes are horizontal or vertical line segments.
+
+    Returns:
+        position (dict): keys: stop_id, values: (x, y) in metres from the center.
+        routes (list): stop ids of each route in travel order.
+    """
+    side = math.ceil(math.sqrt(NUMBER_OF_STOPS))
+    spacing = 400.0
+    position = {}
+    for idx in range(NUMBER_OF_STOPS):
+        row, col = divmod(idx, side)
+        position[idx + 1] = ((col - side / 2) * spacing, (row - side / 2) * spacing)
+
+    routes = []
+    while len(routes) < NUMBER_OF_ROUTES:
+        length = rnd.randint(min(5, side), side)
+        first, line = rnd.randrange(side - length + 1), rnd.randrange(side)
+        if rnd.random() < 0.5:
+            cells = [line * side + col for col in range(first, first + length)]
+        else:
+            cells = [row * side + line for row in range(first, first + length)]
+        route_stops = [cell + 1 for cell in cells if cell < NUMBER_OF_STOPS]
+        if len(route_stops) < 2:
+            continue
+        if rnd.random() < 0.5:
+            route_stops.reverse()
+        routes.append(route_stops)
+
+    return position, routes
+
+
+def _radial_network(NUMBER_OF_STOPS: int, NUMBER_OF_ROUTES: int, rnd) -> tuple:
+    """
+    One center stop and rings of 6 * ring stops with 600 m spacing. Half of the routes cross the city through the
+    center, the others follow an arc of a ring.
+
+    Returns:
+        position (dict): keys: stop_id, values: (x, y) in metres from the center.
+        routes (list): stop ids of each route in travel order.
+    """
+    spacing = 600.0
+    position = {1: (0.0, 0.0)}
+    rings = []
+    stop_id = 2
+    ring = 1
+    while stop_id <= NUMBER_OF_STOPS:
+        ring_stops = []
+        for k in range(6 * ring):
+            if stop_id > NUMBER_OF_STOPS:
+                break
+            angle = 2 * math.pi * k / (6 * ring)
+            position[stop_id] = (ring * spacing * math.cos(angle), ring * spacing * math.sin(angle))
+            ring_stops.append(stop_id)
+            stop_id += 1
+        rings.append(ring_stops)
+        ring += 1
+
+    def spoke(angle):
+        stops = []
+        for ring_stops in rings:
+            nearest = min(ring_stops, key=lambda s: abs(math.remainder(math.atan2(position[s][1], position[s][0]) - angle, 2 * math.pi)))
+            if nearest not in stops:
+                stops.append(nearest)
+        return stops
+
+    routes = []
+    while len(routes) < NUMBER_OF_ROUTES:
+        if not rings or rnd.random() < 0.5:
+            angle = rnd.uniform(0, math.pi)
+            route_stops = spoke(angle + math.pi)[::-1] + [1] + spoke(angle)
+            route_stops = list(dict.fromkeys(route_stops))
+        else:
+            ring_stops = rnd.choice(rings)
+            length = rnd.randint(min(2, len(ring_stops)), len(ring_stops))
+            first = rnd.randrange(len(ring_stops))
+            route_stops = [ring_stops[(first + k) % len(ring_stops)] for k in range(length)]
+        if len(route_stops) < 2:
+            continue
+        if rnd.random() < 0.5:
+            route_stops.reverse()
+        routes.append(route_stops)
+
+    return position, routes
+
+
+def _footpaths(position: dict, served_stops: list, FOOTPATH_DENSITY: float, rnd) -> list:
+    """
+    Connects each served stop to its nearest served stops within MAX_WALKING_DISTANCE, in both directions. Only
+    served stops get footpaths, so every stop reached on foot has routes in routes_by_stop_dict.
+
+    Returns:
+        footpaths (list): list of tuples of form (from stop id, to stop id, footpath duration in seconds).
+    """
+    cells = {}
+    for stop_id in served_stops:
+        x, y = position[stop_id]
+        cells.setdefault((int(x // MAX_WALKING_DISTANCE), int(y // MAX_WALKING_DISTANCE)), []).append(stop_id)
+
+    # every chosen neighbour gives a footpath in both directions
+    neighbours = FOOTPATH_DENSITY / 2
+    pairs = set()
+    for stop_id in served_stops:
+        count = int(neighbours) + (rnd.random() < neighbours - int(neighbours))
+        if count == 0:
+            continue
+        x, y = position[stop_id]
+        cx, cy = int(x // MAX_WALKING_DISTANCE), int(y // MAX_WALKING_DISTANCE)
+        candidates = []
+        for dx in (-1, 0, 1):
+            for dy in (-1, 0, 1):
+                for other in cells.get((cx + dx, cy + dy), []):
+                    distance = _distance(position[stop_id], position[other])
+                    if other != stop_id and distance <= MAX_WALKING_DISTANCE:
+                        candidates.append((distance, other))
+        for distance, other in sorted(candidates)[:count]:
+            pairs.add((stop_id, other, distance))
+            pairs.add((other, stop_id, distance))
+
+    return [(from_stop_id, to_stop_id, max(1, int(distance / WALKING_SPEED))) for from_stop_id, to_stop_id, distance in sorted(pairs)]